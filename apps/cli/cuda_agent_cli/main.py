@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
+import math
 import os
-from typing import AsyncGenerator, Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Literal, Optional
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, see the "fast" extra
+    orjson = None  # type: ignore
+
 try:
     from cuda_agent_core.llm import ChatClient, ChatMessage
 except Exception as e:  # pragma: no cover - allow app to start without core installed
@@ -16,8 +25,38 @@ except Exception as e:  # pragma: no cover - allow app to start without core ins
     ChatMessage = None  # type: ignore
 
 
+def _finite(obj):
+    # NaN/Infinity have no JSON form; orjson writes them as null, do the same
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _dumps(obj) -> bytes:
+    # Compact JSON as UTF-8 bytes; orjson encodes straight to bytes in C
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which the stdlib encodes fine
+    try:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    except ValueError:
+        return json.dumps(_finite(obj), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class _JSONResponse(JSONResponse):
+    # Renders via _dumps: a single orjson call when installed
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
 class ChatMessageModel(BaseModel):
-    role: str = Field(pattern="^(system|user|assistant)$")
+    role: Literal["system", "user", "assistant"]
     content: str
 
 
@@ -26,15 +65,19 @@ class PlanRequest(BaseModel):
     model: Optional[str] = None
     temperature: float = 0.2
     max_tokens: Optional[int] = None
+    # Coalesce streamed deltas for up to this long per frame; 0 sends each delta
+    flush_interval_ms: float = Field(default=5.0, ge=0.0)
 
 
 class ExecuteRequest(BaseModel):
     action: str = "run"
     kernel: Optional[str] = None
     config: Optional[Dict] = None
+    # Multiplier on the simulated per-step delay; 0 streams all steps immediately
+    pace: float = Field(default=1.0, ge=0.0)
 
 
-app = FastAPI(title="CUDAgent API", version="0.1.0")
+app = FastAPI(title="CUDAgent API", version="0.1.0", default_response_class=_JSONResponse)
 
 
 @app.get("/health")
@@ -42,9 +85,101 @@ async def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
-def _sse_event(data: str) -> bytes:
+def _sse_frame(data: bytes) -> bytes:
     # SSE data frame; must end with double newline
-    return f"data: {data}\n\n".encode("utf-8")
+    return b"data: " + data + b"\n\n"
+
+
+_SSE_MEDIA = "text/event-stream"
+# Keep caches and reverse proxies (nginx honours X-Accel-Buffering) from
+# holding frames back. Connection is omitted: it is hop-by-hop and invalid in HTTP/2.
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+_EXECUTE_STEPS = (
+    "Compile kernel...",
+    "Validate vs PyTorch baseline...",
+    "Benchmark: warming up...",
+    "Benchmark: measuring...",
+    "Summarize results...",
+)
+_STARTING = _dumps({"status": "starting"}).decode("utf-8")
+_DONE = "[DONE]"
+_EXECUTE_STEP_S = 0.4
+_PLAN_QUEUE_MAX = 64
+_PUMP_POLL_S = 0.25
+_COALESCE_MAX_BYTES = 64
+
+# Each open plan stream occupies one worker for its whole generation, so streams
+# get their own pool instead of starving the loop's default executor (which also
+# serves getaddrinfo). Size it for the expected number of concurrent streams.
+_PLAN_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("API_PLAN_WORKERS", "32")),
+    thread_name_prefix="coach-plan",
+)
+
+# Frames for constant events are encoded once at import and reused per request
+_SSE_CACHE: Dict[str, bytes] = {
+    s: _sse_frame(s.encode("utf-8")) for s in (*_EXECUTE_STEPS, _STARTING, _DONE)
+}
+
+
+def _pump(
+    client,
+    messages,
+    q: asyncio.Queue,
+    loop: asyncio.AbstractEventLoop,
+    stop: threading.Event,
+) -> None:
+    """Run ``client.stream_chat`` on a worker thread, feeding ``q``.
+
+    Content deltas are queued as ``str`` for the consumer to coalesce; the
+    final error frame or ``[DONE]`` is queued as ready ``bytes``, followed by
+    a ``None`` sentinel. Puts block the worker while the queue is full
+    (backpressure). Setting ``stop`` (consumer gone) closes the upstream
+    stream early.
+    """
+
+    def put(item: str | bytes | None) -> bool:
+        fut = asyncio.run_coroutine_threadsafe(q.put(item), loop)
+        while not stop.is_set():
+            try:
+                fut.result(timeout=_PUMP_POLL_S)
+                return True
+            except TimeoutError:
+                continue
+        fut.cancel()
+        return False
+
+    stream = None
+    try:
+        if stop.is_set():
+            return  # client left while this job waited for a free worker
+        stream = client.stream_chat(messages)
+        for chunk in stream:
+            if chunk.content_delta and not put(chunk.content_delta):
+                return
+        put(_SSE_CACHE[_DONE])
+    except Exception as e:  # surface error to stream
+        put(_sse_frame(_dumps({"error": str(e)})))
+    finally:
+        if stream is not None:
+            stream.close()  # stop pulling (and paying for) tokens nobody will read
+        if not stop.is_set():
+            put(None)
+
+
+def _delta_frame(buf: bytearray) -> bytes:
+    # Content is wrapped as {"delta": ...}: raw text that happens to be valid
+    # JSON (a shape like [1024, 1024]) would otherwise read as a status event,
+    # and JSON escaping keeps newlines inside the frame's single data line
+    return _sse_frame(_dumps({"delta": buf.decode("utf-8")}))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_chat_client(model: Optional[str]):
+    # One long-lived client per model instead of one per request; failed
+    # construction raises and is therefore not cached
+    return ChatClient(model=model)
 
 
 @app.post("/v1/coach/plan")
@@ -54,52 +189,116 @@ async def coach_plan(req: PlanRequest):
 
     # Initialize client (reads env OPENAI_API_KEY)
     try:
-        client = ChatClient(model=req.model)
+        client = _get_chat_client(req.model)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM init error: {e}")
 
+    # Fields are already validated by ChatMessageModel; read them directly
+    # instead of materializing a dict per message via model_dump()
+    messages = [ChatMessage(role=m.role, content=m.content) for m in req.messages]
+    flush_s = req.flush_interval_ms / 1000.0
+
     async def streamer() -> AsyncGenerator[bytes, None]:
         # Yield a small preamble event
-        yield _sse_event(json.dumps({"status": "starting"}))
-        # Bridge sync generator to async streaming
+        yield _SSE_CACHE[_STARTING]
+        # Bridge sync generator to async streaming: a worker thread drains the
+        # LLM stream so the event loop is never blocked waiting on tokens
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue[str | bytes | None] = asyncio.Queue(maxsize=_PLAN_QUEUE_MAX)
+        stop = threading.Event()
+        worker = loop.run_in_executor(_PLAN_EXECUTOR, _pump, client, messages, q, loop, stop)
+        # Deltas are often a few bytes each; batch them into one frame until
+        # the buffer fills or flush_s has passed since its first delta
+        buf = bytearray()
+        deadline = 0.0
         try:
-            for chunk in client.stream_chat([ChatMessage(**m.model_dump()) for m in req.messages] ):
-                if chunk.content_delta:
-                    yield _sse_event(chunk.content_delta)
-                await asyncio.sleep(0)  # cooperative yield
-            yield _sse_event("[DONE]")
-        except Exception as e:  # surface error to stream
-            yield _sse_event(json.dumps({"error": str(e)}))
+            while True:
+                if buf:
+                    try:
+                        item = await asyncio.wait_for(q.get(), max(0.0, deadline - loop.time()))
+                    except TimeoutError:
+                        yield _delta_frame(buf)
+                        buf.clear()
+                        continue
+                else:
+                    item = await q.get()
+                if isinstance(item, str):
+                    if not buf:
+                        deadline = loop.time() + flush_s
+                    buf.extend(item.encode("utf-8"))
+                    if len(buf) >= _COALESCE_MAX_BYTES or loop.time() >= deadline:
+                        yield _delta_frame(buf)
+                        buf.clear()
+                    continue
+                if buf:
+                    yield _delta_frame(buf)
+                    buf.clear()
+                if item is None:
+                    break
+                yield item
+            await worker
+        finally:
+            # Runs on normal completion, on cancellation when Starlette sees the
+            # client disconnect, and when a failed send closes the generator
+            stop.set()
 
-    return StreamingResponse(streamer(), media_type="text/event-stream")
+    return StreamingResponse(streamer(), media_type=_SSE_MEDIA, headers=_SSE_HEADERS)
 
 
-@app.post("/v1/coach/execute")
-async def coach_execute(req: ExecuteRequest):
-    async def streamer() -> AsyncGenerator[bytes, None]:
-        steps = [
-            "Compile kernel...",
-            "Validate vs PyTorch baseline...",
-            "Benchmark: warming up...",
-            "Benchmark: measuring...",
-            "Summarize results...",
-        ]
-        for s in steps:
-            yield _sse_event(s)
-            await asyncio.sleep(0.4)
-        result = {
+# Simulated result is static until runtime hooks land, so its frame is built once
+_EXECUTE_RESULT = _sse_frame(
+    _dumps(
+        {
             "latency_us": 12.34,
             "throughput_gbps": 89.0,
             "status": "ok",
         }
-        yield _sse_event(json.dumps(result))
-        yield _sse_event("[DONE]")
+    )
+)
+
 
-    return StreamingResponse(streamer(), media_type="text/event-stream")
+@app.post("/v1/coach/execute")
+async def coach_execute(req: ExecuteRequest):
+    step_s = _EXECUTE_STEP_S * req.pace
+
+    async def streamer() -> AsyncGenerator[bytes, None]:
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for i, s in enumerate(_EXECUTE_STEPS, start=1):
+            yield _SSE_CACHE[s]
+            if step_s:
+                # Absolute deadlines so send/scheduling latency doesn't accumulate
+                await asyncio.sleep(max(0.0, t0 + step_s * i - loop.time()))
+        yield _EXECUTE_RESULT
+        yield _SSE_CACHE[_DONE]
+
+    return StreamingResponse(streamer(), media_type=_SSE_MEDIA, headers=_SSE_HEADERS)
 
 
 @app.post("/v1/run")
 async def run_kernel(payload: Dict) -> JSONResponse:
     # TODO: integrate with runtime package. For now, echo payload.
-    return JSONResponse({"received": payload, "status": "stub"})
+    return _JSONResponse({"received": payload, "status": "stub"})
+
+
+def run() -> None:
+    """Serve the API with uvicorn (``cuda-agent-api`` console script).
+
+    uvloop and httptools ship with ``uvicorn[standard]``; "auto" picks them up
+    and falls back to asyncio/h11 where they are unavailable. The access log is
+    off because it formats a line per request on the hot path.
+    """
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.getenv("API_HOST", "127.0.0.1"),
+        port=int(os.getenv("API_PORT", "8000")),
+        loop="auto",
+        http="auto",
+        access_log=False,
+    )
+
 
+if __name__ == "__main__":
+    run()
@@ -71,13 +71,15 @@ export default function CoachChat() {
             if (raw.startsWith(' ')) raw = raw.slice(1);
             if (raw.trim() === '[DONE]') continue;
 
-            // Try to parse JSON events (status/error), but do NOT trim normal text chunks
+            // Events are JSON: content ({delta}), errors ({error}) and status
+            // pings. Plain text is still accepted, but do NOT trim it
             let delta = '';
             const jsonProbe = raw.trimStart();
             if (jsonProbe.startsWith('{') || jsonProbe.startsWith('[')) {
               try {
                 const obj = JSON.parse(jsonProbe);
-                if (obj?.error) delta = `\n[error] ${obj.error}`;
+                if (typeof obj?.delta === 'string') delta = obj.delta;
+                else if (obj?.error) delta = `\n[error] ${obj.error}`;
                 // ignore status pings
               } catch {
                 delta = raw; // fall back to raw text
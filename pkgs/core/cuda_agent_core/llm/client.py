@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import os
 import time
 from dataclasses import dataclass
@@ -9,19 +10,28 @@ from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential_jitter,
-    retry_if_exception_type,
+    retry_if_exception,
+)
+
+# LiteLLM errors worth retrying: throttling, timeouts, connection drops, 5xx
+_TRANSIENT_ERROR_NAMES = (
+    "RateLimitError",
+    "Timeout",
+    "APIConnectionError",
+    "ServiceUnavailableError",
+    "InternalServerError",
+    "BadGatewayError",
 )
-from litellm import completion
 
 
 # Simple typed structures for messages and responses
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     role: str  # "system" | "user" | "assistant"
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatResponse:
     model: str
     content: str
@@ -33,7 +43,7 @@ class ChatResponse:
     raw: Optional[dict] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamChunk:
     content_delta: str
     done: bool = False
@@ -43,6 +53,69 @@ class ChatError(Exception):
     pass
 
 
+def _completion(**kwargs):
+    # litellm takes hundreds of ms to import; defer it to the first request so
+    # importing this module (e.g. at API server boot) stays cheap
+    from litellm import completion
+
+    return completion(**kwargs)
+
+
+async def _acompletion(**kwargs):
+    from litellm import acompletion
+
+    return await acompletion(**kwargs)
+
+
+@functools.cache
+def _litellm_errors() -> tuple[tuple, Optional[type]]:
+    import litellm
+
+    # Older litellm releases lack some of these classes
+    transient = (TimeoutError, ConnectionError) + tuple(
+        getattr(litellm, n) for n in _TRANSIENT_ERROR_NAMES if hasattr(litellm, n)
+    )
+    return transient, getattr(litellm, "APIError", None)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    transient, api_error = _litellm_errors()
+    if isinstance(exc, transient):
+        return True
+    # APIError is litellm's catch-all, raised for provider 5xx it has no class for
+    return api_error is not None and isinstance(exc, api_error) and (getattr(exc, "status_code", 0) or 0) >= 500
+
+
+def _close_stream(stream) -> None:
+    # LiteLLM's CustomStreamWrapper has no close(); the provider stream it wraps
+    # does, and closing it drops the HTTP response so generation stops upstream
+    for obj in (stream, getattr(stream, "completion_stream", None)):
+        close = getattr(obj, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                # Best effort: the stream is being abandoned either way
+                pass
+            return
+
+
+def _to_chat_response(model: str, resp, latency_ms: int) -> ChatResponse:
+    choices = resp.get("choices")
+    message = choices[0]["message"] if choices else {}
+    usage = resp.get("usage", {})
+    return ChatResponse(
+        model=model,
+        content=message.get("content") or "",
+        role=message.get("role", "assistant"),
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        total_tokens=usage.get("total_tokens", 0),
+        latency_ms=latency_ms,
+        raw=resp,
+    )
+
+
 def _env(key: str, default: Optional[str] = None) -> Optional[str]:
     v = os.getenv(key)
     return v if v is not None else default
@@ -80,7 +153,8 @@ class ChatClient:
             reraise=True,
             stop=stop_after_attempt(self.retry_max),
             wait=wait_exponential_jitter(initial=self.retry_base, max=8),
-            retry=retry_if_exception_type(Exception),
+            # Auth/bad-request errors fail immediately instead of burning the backoff budget
+            retry=retry_if_exception(_is_transient),
         )
 
     def chat(
@@ -103,7 +177,7 @@ class ChatClient:
         @self._retry_decorator()
         def _invoke():
             t0 = time.time()
-            resp = completion(
+            resp = _completion(
                 model=chosen_model,
                 messages=msgs,
                 temperature=temperature,
@@ -112,20 +186,43 @@ class ChatClient:
                 **(extra or {}),
             )
             dt_ms = int((time.time() - t0) * 1000)
-            content = resp["choices"][0]["message"]["content"] if resp.get("choices") else ""
-            usage = resp.get("usage", {})
-            return ChatResponse(
+            return _to_chat_response(chosen_model, resp, dt_ms)
+
+        return _invoke()
+
+    async def achat(
+        self,
+        messages: Iterable[ChatMessage | Dict[str, str]],
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        extra: Optional[Dict] = None,
+    ) -> ChatResponse:
+        """Async non-streaming chat completion with retries.
+
+        Same contract as ``chat`` but awaits LiteLLM's ``acompletion``, so
+        several requests can be fanned out with ``asyncio.gather``.
+        """
+
+        msgs = [m if isinstance(m, dict) else {"role": m.role, "content": m.content} for m in messages]
+        chosen_model = model or self.model
+
+        @self._retry_decorator()
+        async def _invoke():
+            t0 = time.time()
+            resp = await _acompletion(
                 model=chosen_model,
-                content=content or "",
-                role=resp["choices"][0]["message"].get("role", "assistant") if resp.get("choices") else "assistant",
-                prompt_tokens=usage.get("prompt_tokens", 0),
-                completion_tokens=usage.get("completion_tokens", 0),
-                total_tokens=usage.get("total_tokens", 0),
-                latency_ms=dt_ms,
-                raw=resp,
+                messages=msgs,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=self.timeout,
+                **(extra or {}),
             )
+            dt_ms = int((time.time() - t0) * 1000)
+            return _to_chat_response(chosen_model, resp, dt_ms)
 
-        return _invoke()
+        return await _invoke()
 
     def stream_chat(
         self,
@@ -145,7 +242,7 @@ class ChatClient:
 
         @self._retry_decorator()
         def _invoke_stream():
-            return completion(
+            return _completion(
                 model=chosen_model,
                 messages=msgs,
                 temperature=temperature,
@@ -156,17 +253,22 @@ class ChatClient:
             )
 
         # On retry, the generator itself will be re-created.
-        for event in _invoke_stream():
-            try:
-                delta = event["choices"][0]["delta"].get("content", "")
-                finished = event["choices"][0].get("finish_reason") is not None
-                if delta:
-                    yield StreamChunk(content_delta=delta, done=False)
-                if finished:
-                    yield StreamChunk(content_delta="", done=True)
-            except Exception:
-                # Defensive: if shape is unexpected, skip token
-                continue
+        stream = _invoke_stream()
+        try:
+            for event in stream:
+                try:
+                    delta = event["choices"][0]["delta"].get("content", "")
+                    finished = event["choices"][0].get("finish_reason") is not None
+                    if delta:
+                        yield StreamChunk(content_delta=delta, done=False)
+                    if finished:
+                        yield StreamChunk(content_delta="", done=True)
+                except Exception:
+                    # Defensive: if shape is unexpected, skip token
+                    continue
+        finally:
+            # Also runs when the caller closes this generator early
+            _close_stream(stream)
 
 
 _default_client: Optional[ChatClient] = None
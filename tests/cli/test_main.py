@@ -0,0 +1,293 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from cuda_agent_cli import main
+from cuda_agent_core.llm import StreamChunk
+from cuda_agent_core.llm.client import ChatError
+
+_REAL_GET_CHAT_CLIENT = main._get_chat_client
+
+
+class FakeChatClient:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def stream_chat(self, messages, **kwargs):
+        for d in self.deltas:
+            yield StreamChunk(content_delta=d)
+        yield StreamChunk(content_delta="", done=True)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """TestClient whose plan endpoint streams the deltas assigned to ``api.deltas``."""
+    client = TestClient(main.app)
+    client.deltas = []
+    monkeypatch.setattr(main, "_get_chat_client", lambda model: FakeChatClient(client.deltas))
+    return client
+
+
+def parse_sse_text(body: str) -> str:
+    """Reassemble streamed text the way apps/web/components/CoachChat.tsx does."""
+    out = []
+    for evt in body.split("\n\n"):
+        for ln in evt.split("\n"):
+            if not ln.startswith("data:"):
+                continue
+            raw = ln[5:]
+            if raw.startswith(" "):
+                raw = raw[1:]
+            if raw.strip() == "[DONE]":
+                continue
+            if raw.lstrip().startswith(("{", "[")):
+                try:
+                    obj = json.loads(raw)
+                except ValueError:
+                    pass
+                else:
+                    if isinstance(obj, dict) and isinstance(obj.get("delta"), str):
+                        out.append(obj["delta"])
+                    continue  # status/error events are not content
+            out.append(raw)
+    return "".join(out)
+
+
+def plan(api, **body):
+    resp = api.post("/v1/coach/plan", json={"messages": [{"role": "user", "content": "hi"}], **body})
+    assert resp.status_code == 200
+    return resp.text
+
+
+def frames(body: str) -> list:
+    return [f for f in body.split("\n\n") if f]
+
+
+def deltas_of(body: str) -> list:
+    return [json.loads(f[len("data: ") :])["delta"] for f in frames(body) if f.startswith('data: {"delta"')]
+
+
+@pytest.mark.parametrize(
+    "deltas",
+    [
+        ["```cuda", "\n", "__global__ void k()", "\n", "{ return; }", "\n", "```"],
+        # Lines that are valid JSON on their own must not read as status events
+        ["Use", " shape", ":", "\n", "[", "1024", ",", " 1024", "]", "\n", '{"', "block", '":', " 256", "}", "\n", "done"],
+    ],
+)
+def test_plan_coalescing_keeps_text_around_newlines(api, deltas):
+    api.deltas = deltas
+    per_token = parse_sse_text(plan(api, flush_interval_ms=0))
+    coalesced = parse_sse_text(plan(api, flush_interval_ms=5))
+    assert per_token == "".join(deltas)
+    assert coalesced == per_token
+
+
+def test_plan_frames_are_single_json_lines(api):
+    api.deltas = ["a", "b\nc", "d"]
+    body = plan(api, flush_interval_ms=1000)
+    assert frames(body)[1:] == ['data: {"delta":"ab\\ncd"}', "data: [DONE]"]
+
+
+def test_plan_coalesces_until_size_limit(api):
+    api.deltas = ["0123456789"] * 10
+    body = plan(api, flush_interval_ms=60_000)
+    # 64-byte threshold is crossed on the 7th delta; the rest flush before [DONE]
+    assert deltas_of(body) == ["0123456789" * 7, "0123456789" * 3]
+
+
+def test_plan_flushes_buffer_at_deadline(monkeypatch, api):
+    class SlowClient:
+        def stream_chat(self, messages, **kwargs):
+            yield StreamChunk(content_delta="ab")
+            time.sleep(0.2)
+            yield StreamChunk(content_delta="cd")
+
+    monkeypatch.setattr(main, "_get_chat_client", lambda model: SlowClient())
+    assert deltas_of(plan(api, flush_interval_ms=20)) == ["ab", "cd"]
+
+
+def test_plan_rejects_negative_flush_interval(api):
+    resp = api.post("/v1/coach/plan", json={"messages": [], "flush_interval_ms": -1})
+    assert resp.status_code == 422
+
+
+def run_pump(client, stop, consume):
+    async def go():
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=1)
+        worker = loop.run_in_executor(None, main._pump, client, [], q, loop, stop)
+        await consume(q)
+        await asyncio.wait_for(worker, timeout=5)
+        items = []
+        while not q.empty():
+            items.append(q.get_nowait())
+        return items
+
+    return asyncio.run(go())
+
+
+def test_pump_stop_closes_stream_without_sentinel():
+    closed = threading.Event()
+    stop = threading.Event()
+
+    class EndlessClient:
+        def stream_chat(self, messages, **kwargs):
+            try:
+                while True:
+                    yield StreamChunk(content_delta="x")
+            finally:
+                closed.set()
+
+    async def consume(q):
+        assert await q.get() == "x"
+        stop.set()  # what the plan streamer does when the client disconnects
+
+    items = run_pump(EndlessClient(), stop, consume)
+    assert closed.is_set()
+    assert None not in items
+
+
+def test_pump_skips_upstream_call_after_stop():
+    stop = threading.Event()
+    stop.set()  # client left while the job was queued for a worker
+
+    class UnusedClient:
+        def stream_chat(self, messages, **kwargs):
+            raise AssertionError("upstream request started")
+
+    async def consume(q):
+        pass
+
+    assert run_pump(UnusedClient(), stop, consume) == []
+
+
+def test_plan_stream_error_becomes_error_frame(monkeypatch, api):
+    class FailingClient:
+        def stream_chat(self, messages, **kwargs):
+            yield StreamChunk(content_delta="partial")
+            raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(main, "_get_chat_client", lambda model: FailingClient())
+    body = plan(api)
+    assert frames(body)[1:] == ['data: {"delta":"partial"}', 'data: {"error":"upstream down"}']
+
+
+def test_plan_stream_setup_error_becomes_error_frame(monkeypatch, api):
+    class BrokenClient:
+        def stream_chat(self, messages, **kwargs):
+            raise RuntimeError("bad request")
+
+    monkeypatch.setattr(main, "_get_chat_client", lambda model: BrokenClient())
+    assert frames(plan(api))[1:] == ['data: {"error":"bad request"}']
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"role": "tool", "content": "hi"},
+        {"role": "User", "content": "hi"},
+        {"role": "user"},
+    ],
+)
+def test_plan_rejects_invalid_messages(api, message):
+    resp = api.post("/v1/coach/plan", json={"messages": [message]})
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"][:3] == ["body", "messages", 0]
+
+
+def execute(api, **body):
+    return api.post("/v1/coach/execute", json={"kernel": "k", **body})
+
+
+def test_execute_pace_zero_streams_without_delay(api):
+    t0 = time.monotonic()
+    resp = execute(api, pace=0)
+    assert time.monotonic() - t0 < main._EXECUTE_STEP_S
+    assert resp.status_code == 200
+    out = frames(resp.text)
+    assert out[: len(main._EXECUTE_STEPS)] == ["data: " + s for s in main._EXECUTE_STEPS]
+    assert json.loads(out[-2][len("data: ") :])["status"] == "ok"
+    assert out[-1] == "data: [DONE]"
+
+
+def test_execute_rejects_negative_pace(api):
+    assert execute(api, pace=-1).status_code == 422
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(main, "orjson", None)
+    return request.param
+
+
+def run(api, raw: str):
+    return api.post("/v1/run", content=raw, headers={"Content-Type": "application/json"})
+
+
+def test_run_echoes_integers_beyond_64_bits(api, encoder):
+    resp = run(api, '{"x": 123456789012345678901234567890}')
+    assert resp.status_code == 200
+    assert resp.json() == {"received": {"x": 123456789012345678901234567890}, "status": "stub"}
+
+
+def test_run_renders_non_finite_floats_as_null(api, encoder):
+    resp = run(api, '{"x": NaN, "y": [Infinity, 1.5], "n": 123456789012345678901234567890}')
+    assert resp.status_code == 200
+    assert resp.json()["received"] == {"x": None, "y": [None, 1.5], "n": 123456789012345678901234567890}
+
+
+def assert_sse_headers(resp):
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.headers["cache-control"] == "no-cache"
+    assert resp.headers["x-accel-buffering"] == "no"
+
+
+def test_streams_disable_caching_and_proxy_buffering(api):
+    resp = api.post("/v1/coach/plan", json={"messages": [{"role": "user", "content": "hi"}]})
+    assert_sse_headers(resp)
+    assert_sse_headers(execute(api, pace=0))
+
+
+@pytest.fixture
+def real_client_cache(monkeypatch):
+    """Undo the ``api`` fixture's patch and count ChatClient constructions."""
+    created = []
+
+    class CountingChatClient(FakeChatClient):
+        def __init__(self, model=None):
+            if not os.getenv("OPENAI_API_KEY"):
+                raise ChatError("OPENAI_API_KEY not set in environment")
+            super().__init__(["ok"])
+            created.append(model)
+
+    monkeypatch.setattr(main, "ChatClient", CountingChatClient)
+    monkeypatch.setattr(main, "_get_chat_client", _REAL_GET_CHAT_CLIENT)
+    _REAL_GET_CHAT_CLIENT.cache_clear()
+    yield created
+    _REAL_GET_CHAT_CLIENT.cache_clear()
+
+
+def test_chat_client_is_reused_per_model(monkeypatch, api, real_client_cache):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    for model in ["a", "a", "b", "a", None, None]:
+        assert parse_sse_text(plan(api, model=model)) == "ok"
+    assert real_client_cache == ["a", "b", None]
+
+
+def test_failed_chat_client_init_is_not_cached(monkeypatch, api, real_client_cache):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    resp = api.post("/v1/coach/plan", json={"messages": [{"role": "user", "content": "hi"}]})
+    assert resp.status_code == 500
+    assert "OPENAI_API_KEY" in resp.json()["detail"]
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    assert parse_sse_text(plan(api)) == "ok"
+    assert real_client_cache == [None]
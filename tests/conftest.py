@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Make the workspace packages importable without installing them first
+ROOT = Path(__file__).resolve().parents[1]
+for pkg in ("pkgs/core", "apps/cli"):
+    path = str(ROOT / pkg)
+    if path not in sys.path:
+        sys.path.insert(0, path)
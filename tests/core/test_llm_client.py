@@ -0,0 +1,184 @@
+import asyncio
+import sys
+import types
+
+import pytest
+import tenacity
+
+from cuda_agent_core.llm import ChatClient, ChatMessage
+from cuda_agent_core.llm import client as client_mod
+
+
+class APIError(Exception):
+    def __init__(self, message="", status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class BadGatewayError(Exception):
+    pass
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+@pytest.fixture
+def litellm(monkeypatch):
+    """Stub ``litellm`` module; set ``completion``/``acompletion`` per test."""
+    fake = types.SimpleNamespace(
+        APIError=APIError,
+        RateLimitError=RateLimitError,
+        BadGatewayError=BadGatewayError,
+        AuthenticationError=AuthenticationError,
+    )
+    monkeypatch.setitem(sys.modules, "litellm", fake)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    # No backoff delays in tests; the retry policy itself is unchanged
+    monkeypatch.setattr(client_mod, "wait_exponential_jitter", lambda **kw: tenacity.wait_none())
+    client_mod._litellm_errors.cache_clear()
+    yield fake
+    client_mod._litellm_errors.cache_clear()
+
+
+def _ok(content="ok"):
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 2, "completion_tokens": 3, "total_tokens": 5},
+    }
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        RateLimitError("slow down"),
+        BadGatewayError("502"),
+        APIError("unmapped 503", status_code=503),
+        TimeoutError(),
+        ConnectionError(),
+    ],
+)
+def test_chat_retries_transient_errors(litellm, exc):
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            raise exc
+        return _ok()
+
+    litellm.completion = completion
+    resp = ChatClient(retry_max=3).chat([{"role": "user", "content": "hi"}])
+    assert resp.content == "ok"
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        AuthenticationError("bad key"),
+        APIError("bad request", status_code=400),
+        ValueError("bug"),
+    ],
+)
+def test_chat_does_not_retry_permanent_errors(litellm, exc):
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        raise exc
+
+    litellm.completion = completion
+    with pytest.raises(type(exc)):
+        ChatClient(retry_max=3).chat([{"role": "user", "content": "hi"}])
+    assert len(calls) == 1
+
+
+def test_achat_retries_and_converts_response(litellm):
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RateLimitError("slow down")
+        return _ok("hello")
+
+    litellm.acompletion = acompletion
+    client = ChatClient(model="m", retry_max=3)
+    resp = asyncio.run(client.achat([ChatMessage(role="user", content="hi")], max_tokens=8))
+    assert len(calls) == 2
+    assert calls[-1]["model"] == "m"
+    assert calls[-1]["messages"] == [{"role": "user", "content": "hi"}]
+    assert calls[-1]["max_tokens"] == 8
+    assert (resp.content, resp.role, resp.model) == ("hello", "assistant", "m")
+    assert (resp.prompt_tokens, resp.completion_tokens, resp.total_tokens) == (2, 3, 5)
+    assert resp.raw == _ok("hello")
+
+
+def test_achat_tolerates_missing_choices_and_usage(litellm):
+    async def acompletion(**kwargs):
+        return {"choices": []}
+
+    litellm.acompletion = acompletion
+    resp = asyncio.run(ChatClient().achat([{"role": "user", "content": "hi"}]))
+    assert (resp.content, resp.role, resp.total_tokens) == ("", "assistant", 0)
+
+
+def _event(content, finish_reason=None):
+    return {"choices": [{"delta": {"content": content}, "finish_reason": finish_reason}]}
+
+
+def test_stream_chat_yields_deltas_and_retries_the_request(litellm):
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise BadGatewayError("502")
+        return iter([_event("Hel"), _event(""), {"choices": []}, _event("lo", finish_reason="stop")])
+
+    litellm.completion = completion
+    chunks = list(ChatClient().stream_chat([ChatMessage(role="user", content="hi")]))
+    assert len(calls) == 2
+    assert calls[-1]["stream"] is True
+    # Empty deltas and malformed events are skipped; finish_reason ends the stream
+    assert [(c.content_delta, c.done) for c in chunks] == [("Hel", False), ("lo", False), ("", True)]
+
+
+class _ProviderStream:
+    def __init__(self, events):
+        self._events = iter(events)
+        self.closed = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self):
+        self.closed = True
+
+
+class _StreamWrapper:
+    """Mimics litellm's CustomStreamWrapper: iterable, but no close()."""
+
+    def __init__(self, completion_stream):
+        self.completion_stream = completion_stream
+
+    def __iter__(self):
+        return iter(self.completion_stream)
+
+
+@pytest.mark.parametrize("consume_all", [False, True])
+def test_stream_chat_closes_provider_stream(litellm, consume_all):
+    provider = _ProviderStream([_event("a"), _event("b"), _event("c", finish_reason="stop")])
+    litellm.completion = lambda **kwargs: _StreamWrapper(provider)
+    stream = ChatClient().stream_chat([{"role": "user", "content": "hi"}])
+    if consume_all:
+        assert "".join(c.content_delta for c in stream) == "abc"
+    else:
+        assert next(stream).content_delta == "a"
+        stream.close()  # what the coach API does when its client disconnects
+    assert provider.closed